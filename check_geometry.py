@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import sys
+
+from fingerprint import compare
+from gen_configs import CONFIG_STORE, iter_configs
+
+# usage:
+#   python3 check_geometry.py           compare output/ against baselines/
+#   python3 check_geometry.py --update  store output/ fingerprints as baselines
+
+BASELINE_DIR = "baselines"
+
+
+def fp_name(name):
+    return name + "_fp.json"
+
+
+def load(fn):
+    with open(fn, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(name):
+    cfp = os.path.join("output", fp_name(name))
+    bfp = os.path.join(BASELINE_DIR, fp_name(name))
+
+    if not os.path.isfile(cfp):
+        return name, ["no fingerprint in output/"]
+    if not os.path.isfile(bfp):
+        return name, ["no baseline"]
+
+    return name, compare(load(bfp), load(cfp))
+
+
+def update(name):
+    cfp = os.path.join("output", fp_name(name))
+    assert os.path.isfile(cfp), "File {} doesn't exist".format(cfp)
+    shutil.copy(cfp, os.path.join(BASELINE_DIR, fp_name(name)))
+    return name
+
+
+if __name__ == "__main__":
+    names = [config.name for _, config in iter_configs(CONFIG_STORE)]
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--update":
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        for i, name in enumerate(names):
+            update(name)
+            print("({}/{}) Updated baseline: {}".format(i + 1, len(names), name))
+        sys.exit(0)
+
+    failed = 0
+    for name, diffs in map(check, names):
+        if diffs:
+            failed += 1
+            print("FAIL {}".format(name))
+            for d in diffs:
+                print("    {}".format(d))
+        else:
+            print("OK   {}".format(name))
+
+    print("{}/{} configs match their baselines".format(len(names) - failed, len(names)))
+    sys.exit(1 if failed else 0)
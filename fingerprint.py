@@ -0,0 +1,87 @@
+import json
+import math
+import hashlib
+
+from OCP.Bnd import Bnd_Box
+from OCP.BRepBndLib import BRepBndLib
+from OCP.BRepGProp import BRepGProp
+from OCP.GProp import GProp_GProps
+
+RTOL = 1e-6
+ATOL = 1e-3
+
+
+def fingerprint(shape) -> dict:
+    # ignore any triangulation attached by earlier exports, so the
+    # bounding box doesn't depend on the export order
+    bb = Bnd_Box()
+    BRepBndLib.Add_s(shape.wrapped, bb, False)
+    xmin, ymin, zmin, xmax, ymax, zmax = bb.Get()
+
+    # volume, center of mass and inertia from a single integration
+    props = GProp_GProps()
+    BRepGProp.VolumeProperties_s(shape.wrapped, props)
+    c = props.CentreOfMass()
+    moi = props.MatrixOfInertia()
+
+    return {
+        "volume": props.Mass(),
+        "area": shape.Area(),
+        "bbox": [xmin, ymin, zmin, xmax, ymax, zmax],
+        "center": [c.X(), c.Y(), c.Z()],
+        # inertia about the center of mass: xx, yy, zz, xy, xz, yz
+        "inertia": [moi.Value(1, 1), moi.Value(2, 2), moi.Value(3, 3),
+                    moi.Value(1, 2), moi.Value(1, 3), moi.Value(2, 3)],
+        "faces": len(shape.Faces()),
+    }
+
+
+def shape_key(shape) -> str:
+    """Cheap exact key of a shape, without tessellating it"""
+    bb = shape.BoundingBox()
+    key = repr((shape.Volume(), shape.Area(),
+                bb.xmin, bb.ymin, bb.zmin, bb.xmax, bb.ymax, bb.zmax,
+                len(shape.Faces()), len(shape.Edges())))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def save_fingerprints(fn, plates: dict):
+    with open(fn, 'w', encoding='utf-8') as f:
+        json.dump({name: fingerprint(wp.val()) for name, wp in plates.items()},
+                  f, indent=2, sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, rtol=RTOL, atol=ATOL):
+    diffs = []
+
+    for plate in sorted(set(baseline) | set(current)):
+        if plate not in current:
+            diffs.append("{}: missing plate".format(plate))
+            continue
+        if plate not in baseline:
+            diffs.append("{}: new plate".format(plate))
+            continue
+
+        b = baseline[plate]
+        c = current[plate]
+
+        for k in ["volume", "area"]:
+            if not math.isclose(b[k], c[k], rel_tol=rtol, abs_tol=atol):
+                diffs.append("{}: {} {} -> {}".format(plate, k, b[k], c[k]))
+
+        for k in ["bbox", "center"]:
+            for i, (bv, cv) in enumerate(zip(b[k], c[k])):
+                if not math.isclose(bv, cv, abs_tol=atol):
+                    diffs.append("{}: {}[{}] {} -> {}".format(plate, k, i, bv, cv))
+
+        # the products of inertia of symmetric plates are ~0, so they are
+        # compared relative to the largest moment
+        scale = max(abs(v) for v in b["inertia"][:3])
+        for i, (bv, cv) in enumerate(zip(b["inertia"], c["inertia"])):
+            if not math.isclose(bv, cv, rel_tol=rtol, abs_tol=rtol * scale):
+                diffs.append("{}: inertia[{}] {} -> {}".format(plate, i, bv, cv))
+
+        if b["faces"] != c["faces"]:
+            diffs.append("{}: faces {} -> {}".format(plate, b["faces"], c["faces"]))
+
+    return diffs
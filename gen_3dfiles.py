@@ -1,28 +1,114 @@
-import glob
+import json
+import sys
 import subprocess
 import os
+import time
 import multiprocessing
 
+from gen_configs import CONFIG_STORE, iter_configs
+from scheduler import CostModel, longest_first, makespan
 
-def process(fn):
-    i_file = os.path.basename(fn)
-    o_file = os.path.splitext(i_file)[0]
+# measured peak memory and build time of past builds, used to size
+# the worker pool and to order the jobs
+STATS_FILE = os.path.join("output", "build_stats.json")
 
-    ofp = os.path.join("output", o_file + ".stl")
 
-    ret = subprocess.run(["cq-cli", "--codec", "stl", "--infile", "keyboard.py",
+def load_stats():
+    if not os.path.isfile(STATS_FILE):
+        return {}
+    with open(STATS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_stats(stats):
+    with open(STATS_FILE, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2, sort_keys=True)
+
+
+def available_memory():
+    """Available memory in kB, None if it can't be determined"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def pool_size(peaks):
+    n = multiprocessing.cpu_count()
+    mem = available_memory()
+    if not peaks or not mem:
+        return n
+    # leave some headroom for the parent process and page cache
+    return max(1, min(n, int(0.9 * mem) // max(peaks)))
+
+
+def process(job):
+    offset, name, _ = job
+
+    start = time.time()
+    ofp = os.path.join("output", name + ".stl")
+
+    p = subprocess.Popen(["cq-cli", "--codec", "stl", "--infile", "keyboard.py",
                           "--outfile", ofp,
-                          "--params", "i:{}".format(fn)])
+                          "--params", "i:{}@{}".format(CONFIG_STORE, offset)])
+    # wait4() gives the resource usage of this particular child
+    _, status, usage = os.wait4(p.pid, 0)
+    p.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
 
-    assert(ret.returncode == 0)
+    assert(p.returncode == 0)
     assert os.path.isfile(ofp), "File {} doesn't exist".format(ofp)
 
-    return o_file
+    ffp = os.path.join("output", name + "_fillets.json")
+    with open(ffp, "r", encoding="utf-8") as f:
+        fillets = json.load(f)
+
+    # ru_maxrss is in kB on Linux
+    return name, usage.ru_maxrss, time.time() - start, fillets
+
+
+if __name__ == "__main__":
+    stats = load_stats()
+    configs = list(iter_configs(CONFIG_STORE))
+    model = CostModel([config for _, config in configs], stats)
+
+    peaks = [stats[config.name]["peak_rss"]
+             for _, config in configs
+             if "peak_rss" in stats.get(config.name, {})]
+    n_workers = pool_size(peaks)
+    print("Using {} workers".format(n_workers))
+
+    # longest jobs first, so a big build doesn't start last and
+    # dominate the total time
+    jobs = longest_first(
+        [(offset, config.name, model.predict(config)) for offset, config in configs],
+        lambda job: job[2])
+    predicted = makespan([job[2] for job in jobs], n_workers)
 
+    start = time.time()
+    results = multiprocessing.Pool(n_workers).imap_unordered(process, jobs)
+    n_degraded = 0
+    for i, (fn, peak, t, fillets) in enumerate(results):
+        # fillets done with a smaller radius or skipped
+        degraded = [f for f in fillets if f["used"] != f["radius"]]
+        stats.setdefault(fn, {}).update(peak_rss=peak, time=t, fillets=fillets,
+                                        degraded_fillets=degraded)
+        # save as we go, so the measurements survive a failing job
+        save_stats(stats)
+        print("({}/{}) Generated file: {} ({:.1f} s, peak memory {} MB)".format(
+            i + 1, len(jobs), fn, t, peak // 1024))
+        for d in degraded:
+            n_degraded += 1
+            print("    fillet {} r={} degraded to r={}".format(
+                d["faces"], d["radius"], d["used"]))
 
-files = glob.glob("configs/*.json")
-files.sort()
+    print("Predicted makespan: {:.1f} s, actual: {:.1f} s".format(
+        predicted, time.time() - start))
 
-results = multiprocessing.Pool().imap(process, files)
-for i, fn in enumerate(results):
-    print("({}/{}) Generated file: {}".format(i + 1, len(files), fn))
+    if n_degraded:
+        print("{} fillets were done with a smaller radius or skipped, "
+              "see {}".format(n_degraded, STATS_FILE))
+        sys.exit(1)
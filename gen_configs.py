@@ -1,9 +1,12 @@
 import math
 import hashlib
 
+import copy
 import json
 from enum import IntEnum
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
+
+CONFIG_STORE = "configs.jsonl"
 
 
 class Shape(IntEnum):
@@ -11,7 +14,26 @@ class Shape(IntEnum):
     HULL = 1
 
 
+def _is_int(v) -> bool:
+    # bool is a subclass of int, but True isn't a valid column count
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _is_number(v) -> bool:
+    return _is_int(v) or isinstance(v, float)
+
+
+def _is_pair(v, is_item) -> bool:
+    return isinstance(v, (list, tuple)) and len(v) == 2 and all(map(is_item, v))
+
+
 class Config:
+    __slots__ = ('nRows', 'nCols', 'thumbKeys', 'columnSpacing', 'rowSpacing',
+                 'staggering', 'switchHoleSize', 'angle', 'hOffset',
+                 'plateThickness', 'shape', 'screwHoleDiameter',
+                 'spacerThickness', 'split', 'cnc', 'notched',
+                 'mcu_footprint', 'name')
+
     nRows: int
     nCols: int
     thumbKeys: Optional[list]
@@ -26,7 +48,10 @@ class Config:
     screwHoleDiameter: float
     spacerThickness: float
     split: bool
-    mcu_footprint = Optional[Tuple[float, float]]
+    cnc: bool
+    notched: bool
+    mcu_footprint: Optional[Tuple[float, float]]
+    name: str
 
     def __init__(self, nc, nr, cs=19, rs=19, switchHoleSize=13.97,
                  angle=10, hOffset=None, plateThickness=1.5,
@@ -63,10 +88,13 @@ class Config:
         self.update_name()
         self.mcu_footprint = mcu_footprint
 
+    def n_keys(self) -> int:
+        return 2 * (self.nCols * self.nRows +
+                    (len(self.thumbKeys) if self.thumbKeys else 0))
+
     def update_name(self):
         name = 'atreus_{}{}_{}'.format(
-            2 * (self.nCols * self.nRows +
-                 (len(self.thumbKeys) if self.thumbKeys else 0)),
+            self.n_keys(),
             ('h' if self.shape == Shape.HULL else 'l') +
             ('s' if self.split else ''),
             'cnc' if self.cnc else 'print')
@@ -75,6 +103,107 @@ class Config:
         m.update(name2.encode('utf-8'))
         self.name = name + "_" + m.hexdigest()[:7]
 
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'Config':
+        keys = set(cls.__slots__)
+        if set(d) != keys:
+            raise ValueError("Invalid config keys, missing: {}, unknown: {}".format(
+                sorted(keys - set(d)), sorted(set(d) - keys)))
+
+        for k in ['nCols', 'nRows']:
+            if not _is_int(d[k]) or d[k] < 1:
+                raise ValueError("{} must be a positive integer".format(k))
+        for k in ['columnSpacing', 'rowSpacing', 'switchHoleSize', 'hOffset',
+                  'plateThickness', 'spacerThickness', 'screwHoleDiameter']:
+            if not _is_number(d[k]) or d[k] <= 0:
+                raise ValueError("{} must be a positive number".format(k))
+        if not _is_number(d['angle']):
+            raise ValueError("angle must be a number")
+        for k in ['split', 'cnc', 'notched']:
+            if not isinstance(d[k], bool):
+                raise ValueError("{} must be a boolean".format(k))
+        if not _is_int(d['shape']) or d['shape'] not in set(Shape):
+            raise ValueError("shape must be one of {}".format([int(s) for s in Shape]))
+        if d['staggering'] is not None and not (
+                isinstance(d['staggering'], list) and
+                all(_is_number(v) for v in d['staggering'])):
+            raise ValueError("staggering must be a list of numbers")
+        if d['thumbKeys'] is not None and not (
+                isinstance(d['thumbKeys'], list) and
+                all(_is_pair(xy, _is_int) for xy in d['thumbKeys'])):
+            raise ValueError("thumbKeys must be a list of (x, y) pairs")
+        if (d['mcu_footprint'] is not None and
+                not _is_pair(d['mcu_footprint'], _is_number)):
+            raise ValueError("mcu_footprint must be a (width, height) pair")
+        if not isinstance(d['name'], str):
+            raise ValueError("name must be a string")
+
+        config = cls(d['nCols'], d['nRows'], cs=d['columnSpacing'],
+                     rs=d['rowSpacing'], switchHoleSize=d['switchHoleSize'],
+                     angle=d['angle'], hOffset=d['hOffset'],
+                     plateThickness=d['plateThickness'],
+                     spacerThickness=d['spacerThickness'],
+                     screwHoleDiameter=d['screwHoleDiameter'],
+                     shape=Shape(d['shape']), split=d['split'],
+                     staggering=d['staggering'],
+                     thumbKeys=([tuple(xy) for xy in d['thumbKeys']]
+                                if d['thumbKeys'] else d['thumbKeys']),
+                     cnc=d['cnc'], notched=d['notched'],
+                     mcu_footprint=(tuple(d['mcu_footprint'])
+                                    if d['mcu_footprint'] else d['mcu_footprint']))
+        if config.name != d['name']:
+            raise ValueError("Config name mismatch: {} != {}".format(
+                d['name'], config.name))
+
+        return config
+
+
+def iter_variants(configs) -> Iterator[Config]:
+    for config in configs:
+        for cnc in [False, True]:
+            for split in [False, True]:
+                for shape in [Shape.LEAN]:
+                    variant = copy.copy(config)
+                    variant.cnc = cnc
+                    variant.split = split
+                    variant.shape = shape
+                    variant.update_name()
+                    yield variant
+
+
+def write_configs(fn, configs):
+    with open(fn, 'w', encoding='utf-8') as f:
+        for config in configs:
+            f.write(json.dumps(config.to_dict(), separators=(',', ':')) + '\n')
+
+
+def iter_configs(fn) -> Iterator[Tuple[int, Config]]:
+    """Yields (offset, config) pairs, offset can be passed to `load_config`"""
+    with open(fn, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield offset, Config.from_dict(json.loads(line))
+
+
+def load_config(fn, offset=0) -> Config:
+    with open(fn, 'rb') as f:
+        f.seek(offset)
+        return Config.from_dict(json.loads(f.readline()))
+
+
+def find_config(fn, name) -> Config:
+    for _, config in iter_configs(fn):
+        if config.name == name:
+            return config
+    raise KeyError(name)
+
 
 configs = [
     # some minimal configs :)
@@ -115,14 +244,4 @@ configs = [
 ]
 
 if __name__ == "__main__":
-    for config in configs:
-        for cnc in [False, True]:
-            for split in [False, True]:
-                for shape in [Shape.LEAN]:
-                    config.cnc = cnc
-                    config.split = split
-                    config.shape = shape
-                    config.update_name()
-
-                    with open("configs/" + config.name + ".json", 'w', encoding='utf-8') as f:
-                        json.dump(config.__dict__, f)
+    write_configs(CONFIG_STORE, iter_variants(configs))
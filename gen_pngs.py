@@ -3,6 +3,8 @@ import subprocess
 import os
 import multiprocessing
 
+from scheduler import longest_first
+
 
 def process(fn):
     print('Converting {} to PNG'.format(fn))
@@ -20,9 +22,11 @@ def adjust_name(fn):
 
 
 files = glob.glob("output/*.svg")
-files.sort(key=adjust_name)
 
-results = multiprocessing.Pool().imap(process, files)
+# conversion time grows with the SVG size, start with the biggest files
+results = multiprocessing.Pool().imap_unordered(
+    process, longest_first(files, os.path.getsize))
+results = sorted(results, key=adjust_name)
 
 with open('GALLERY.md', 'w') as gf:
     gf.write("# Gallery\n\n")
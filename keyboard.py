@@ -1,12 +1,16 @@
 import os
 import sys
 import math
+import time
+import hashlib
 from typing import List, Tuple
 import json
 
 from functools import partial
 
-from gen_configs import Config, Shape
+from gen_configs import CONFIG_STORE, Config, Shape, find_config, load_config
+from fingerprint import save_fingerprints, shape_key
+import OCP
 from cadquery import Location as Loc, Vector as Vec
 
 
@@ -283,7 +287,82 @@ def get_mcu_pcb(config):
     return pcb, pcb_base
 
 
+def fillet(wp, faces, radius, cache_dir=None, records=None):
+    """Fillets the edges of the selected faces.
+
+    If the fillet fails it's retried with half the radius and as a last resort
+    skipped, so a single problematic fillet doesn't waste the whole build.
+    The radius that worked is cached in `cache_dir` by the input shape and the
+    library versions, and tried first on the next build. The radius used and
+    the timing of every attempt are appended to `records`.
+    """
+    radii = [radius, radius / 2, None]
+    hit, cached = False, None
+
+    fn = None
+    if cache_dir:
+        m = hashlib.sha1()
+        m.update("{}{}{}{}{}".format(
+            shape_key(wp.val()), faces, radius,
+            cq.__version__, getattr(OCP, "__version__", "")).encode("utf-8"))
+        fn = os.path.join(cache_dir, m.hexdigest() + ".json")
+        try:
+            with open(fn, "r", encoding="utf-8") as f:
+                cached = json.load(f)["radius"]
+            hit = True
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing or broken entry, treated as a cache miss
+            pass
+
+        if hit and cached is None:
+            # only the smaller radius is retried after a cached skip
+            radii = [radius / 2, None]
+        elif hit:
+            # if the cached radius doesn't work anymore the others are tried
+            radii = [cached] + [r for r in radii if r != cached]
+
+    res, used = wp, None
+    attempts = []
+    for r in radii:
+        if r is None:
+            break
+
+        start = time.time()
+        try:
+            filleted = wp.faces(faces).edges().fillet(r)
+            if not filleted.val().isValid():
+                raise ValueError("invalid result")
+        except Exception as e:
+            attempts.append({"radius": r, "time": time.time() - start, "error": str(e)})
+            continue
+
+        attempts.append({"radius": r, "time": time.time() - start, "error": None})
+        res, used = filleted, r
+        break
+
+    if records is not None:
+        records.append(
+            {"faces": faces, "radius": radius, "used": used, "attempts": attempts}
+        )
+
+    if fn and (not hit or used != cached):
+        os.makedirs(cache_dir, exist_ok=True)
+        # workers may share the cache, write to a temporary file and
+        # rename it so a reader never sees a partial entry
+        tmp = "{}.{}".format(fn, os.getpid())
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"radius": used}, f)
+        os.replace(tmp, fn)
+
+    return res
+
+
 def generate(config: Config, odir="output", switch_mesh=False):
+    fillets = []
+    fillet_plate = partial(
+        fillet, cache_dir=os.path.join(odir, "fillet_cache"), records=fillets
+    )
+
     kp = get_key_positions(config)
     shp_top = get_screw_holes_pos(config, kp)
     shp_bottom = [(-x, -y) for x, y in shp_top]
@@ -355,11 +434,8 @@ def generate(config: Config, odir="output", switch_mesh=False):
             reinfs = get_keys(kp, reinf)
             reinfs = reinfs.mirror("YZ", union=True)
             reinfPlate = base.cut(reinfs)
-            switchPlate = (
-                base.union(reinfPlate.translate((0, 0, -1)))
-                .faces("<Z[1]")
-                .edges()
-                .fillet(0.9)
+            switchPlate = fillet_plate(
+                base.union(reinfPlate.translate((0, 0, -1))), "<Z[1]", 0.9
             )
             switchPlate = switchPlate.cut(keys)
             rot = partial(rotate, config)
@@ -459,8 +535,15 @@ def generate(config: Config, odir="output", switch_mesh=False):
 
         cq.exporters.export(flat, os.path.join(odir, "{}_flat.dxf".format(config.name)))
 
+        plates = {
+            "bottom": bottomPlate,
+            "spacer": spacerPlate,
+            "switch": switchPlate,
+            "top": topPlate,
+        }
+
     else:
-        bottomPlate = bottomPlate.faces("<Z").edges().fillet(1.0)
+        bottomPlate = fillet_plate(bottomPlate, "<Z", 1.0)
         angle = math.degrees(math.atan(1.5 / 1.7))
         bottomPlate = (
             bottomPlate.faces("<Z")
@@ -498,9 +581,9 @@ def generate(config: Config, odir="output", switch_mesh=False):
             .extrude(1)
             .mirror("ZY", union=True)
         )
-        bottomPlate = bottomPlate.faces("<Z").edges().fillet(0.2)
+        bottomPlate = fillet_plate(bottomPlate, "<Z", 0.2)
 
-        topPlate = topPlate.faces(">Z").edges().fillet(0.7)
+        topPlate = fillet_plate(topPlate, ">Z", 0.7)
         topPlate = spacerPlate.union(
             switchPlate.translate((0, 0, config.spacerThickness))
         ).union(
@@ -542,6 +625,8 @@ def generate(config: Config, odir="output", switch_mesh=False):
         ).add(topPlate, name="top", loc=Loc(Vec(0, 0, config.plateThickness)))
         exp = bottomPlate.union(topPlate.translate((0, 0, config.plateThickness + 0.1)))
 
+        plates = {"bottom": bottomPlate, "top": topPlate}
+
     opt = {
         "width": 1200,
         "height": 1200,
@@ -554,6 +639,10 @@ def generate(config: Config, odir="output", switch_mesh=False):
     }
 
     cq.exporters.export(exp, os.path.join(odir, "{}.svg".format(config.name)), opt=opt)
+    save_fingerprints(os.path.join(odir, "{}_fp.json".format(config.name)), plates)
+    fn = os.path.join(odir, "{}_fillets.json".format(config.name))
+    with open(fn, "w", encoding="utf-8") as f:
+        json.dump(fillets, f)
     # cq.exporters.export(exp, os.path.join(odir, '{}.stl'.format(config.name)))
     # assy.save(os.path.join(odir, '{}.step'.format(config.name)))
 
@@ -561,23 +650,23 @@ def generate(config: Config, odir="output", switch_mesh=False):
 
 
 # no arguments == CQ-Editor mode
+# the argument is either `<store>.jsonl@<offset>` or a path to a single JSON config
 if len(sys.argv) > 1:
     fn = sys.argv[-1].split(":")[-1]
+    if "@" in fn:
+        fn, offset = fn.rsplit("@", 1)
+        config = load_config(fn, int(offset))
+    else:
+        with open(fn, "r", encoding="utf-8") as f:
+            config = Config.from_dict(json.load(f))
 else:
-    fn = "configs/atreus_52l_print_97a7fee.json"
-
-with open(fn, "r", encoding="utf-8") as f:
-
-    def config():
-        return None
-
-    config.__dict__ = json.loads(f.read())
+    config = find_config(CONFIG_STORE, "atreus_52l_print_97a7fee")
 
-    if config.split and config.mcu_footprint:
-        config.hOffset += config.mcu_footprint[0]
+if config.split and config.mcu_footprint:
+    config.hOffset += config.mcu_footprint[0]
 
-    obj, assy = generate(config)
-    if len(sys.argv) > 1:
-        show_object(obj)
-    else:
-        show_object(assy)
+obj, assy = generate(config)
+if len(sys.argv) > 1:
+    show_object(obj)
+else:
+    show_object(assy)
@@ -0,0 +1,58 @@
+import heapq
+
+from gen_configs import Config
+
+# rough build time in seconds per key, the CNC variants skip the
+# switch reinforcements and fillets, split variants need extra mirroring
+SECONDS_PER_KEY = 1.0
+CNC_FACTOR = 0.4
+SPLIT_FACTOR = 1.1
+
+
+def base_cost(config: Config):
+    cost = SECONDS_PER_KEY * config.n_keys()
+    if config.cnc:
+        cost *= CNC_FACTOR
+    if config.split:
+        cost *= SPLIT_FACTOR
+    return cost
+
+
+class CostModel:
+    """Predicts build times from the key count and variant, corrected with
+    the timings recorded in past runs"""
+
+    def __init__(self, configs, stats):
+        # per variant ratio between measured and estimated build time
+        ratios = {}
+        for config in configs:
+            t = stats.get(config.name, {}).get("time")
+            if t:
+                ratios.setdefault(self.variant(config), []).append(
+                    t / base_cost(config))
+
+        self.scale = {k: sum(v) / len(v) for k, v in ratios.items()}
+        self.stats = stats
+
+    @staticmethod
+    def variant(config: Config):
+        return (config.cnc, config.split)
+
+    def predict(self, config: Config):
+        t = self.stats.get(config.name, {}).get("time")
+        if t:
+            return t
+        return base_cost(config) * self.scale.get(self.variant(config), 1.0)
+
+
+def longest_first(jobs, cost):
+    return sorted(jobs, key=cost, reverse=True)
+
+
+def makespan(costs, n_workers):
+    """Makespan of greedy list scheduling, i.e. each job goes to the first
+    worker that becomes free, which is what Pool.imap_unordered does"""
+    workers = [0.0] * n_workers
+    for c in costs:
+        heapq.heappush(workers, heapq.heappop(workers) + c)
+    return max(workers)